@@ -3,91 +3,333 @@ Database module for MCP Security Dashboard
 
 Uses SQLite for simple, file-based persistence.
 """
+import os
+import queue
 import sqlite3
 import json
-from datetime import datetime, timedelta
-from typing import Optional
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator, Optional
 from pathlib import Path
 
+import orjson
+
+from .models import RiskLevel, RISK_TO_INT, INT_TO_RISK
+
+
+# Vulnerability fields packed into the data blob; every finding produced
+# by the scanner carries these keys
+_VULNERABILITY_DATA_FIELDS = (
+    "tool_name", "vulnerability_type", "description",
+    "evidence", "owasp_mapping", "remediation"
+)
+
+# Stored risk level codes, interpolated into aggregate queries
+_CRITICAL = RISK_TO_INT[RiskLevel.CRITICAL]
+_HIGH = RISK_TO_INT[RiskLevel.HIGH]
+_MEDIUM = RISK_TO_INT[RiskLevel.MEDIUM]
+_LOW = RISK_TO_INT[RiskLevel.LOW]
+_INFO = RISK_TO_INT[RiskLevel.INFO]
+
+
+def _risk_code(risk_level: str) -> int:
+    """Encode a risk level for storage; unrecognized levels are stored as INFO."""
+    return RISK_TO_INT.get(risk_level, _INFO)
+
+
+def _vulnerability_row(scan_id: str, vuln: dict) -> tuple:
+    """Build an INSERT_VULNERABILITY_SQL parameter tuple for a finding."""
+    data = {field: vuln[field] for field in _VULNERABILITY_DATA_FIELDS}
+    return (scan_id, _risk_code(vuln["risk_level"]), vuln["id"], orjson.dumps(data))
+
 
 class Database:
     """SQLite database for storing scan results."""
     
-    def __init__(self, db_path: str = "mcp_scans.db"):
+    # Kept as a single constant so every insert hits sqlite3's statement cache
+    INSERT_VULNERABILITY_SQL = """
+        INSERT INTO vulnerabilities (scan_id, risk_level, id, data)
+        VALUES (?, ?, ?, ?)
+    """
+    
+    # Bumped whenever an existing table needs rebuilding in init_db
+    SCHEMA_VERSION = 5
+    
+    # Only the filtered and aggregated columns are stored separately; the
+    # rest of each finding is an orjson-encoded object in data
+    VULNERABILITIES_TABLE_SQL = """
+        CREATE TABLE IF NOT EXISTS {table} (
+            id TEXT PRIMARY KEY,
+            scan_id TEXT NOT NULL,
+            risk_level INTEGER NOT NULL CHECK (risk_level BETWEEN 0 AND 4),
+            data BLOB NOT NULL,
+            FOREIGN KEY (scan_id) REFERENCES scans (scan_id) ON DELETE CASCADE
+        )
+    """
+    
+    # Seconds a computed get_stats result may be served from memory
+    STATS_CACHE_TTL = 5.0
+    
+    def __init__(self, db_path: str = "mcp_scans.db", pool_size: Optional[int] = None):
         self.db_path = db_path
-        self.conn = None
+        self.pool_size = pool_size or min(os.cpu_count() or 1, 8)
+        
+        # One dedicated writer, serialized by a lock
+        self._write_conn = None
+        self._write_lock = threading.Lock()
+        
+        # Read-only connections, opened lazily up to pool_size
+        self._read_pool = queue.Queue()
+        self._read_conns = []
+        self._pool_lock = threading.Lock()
+        
+        # Bumped after every committed write so cached reads can be invalidated
+        self._write_version = 0
+        self._stats_cache = None  # (expires_at, write_version, stats)
+    
+    def _connect(self, read_only: bool = False) -> sqlite3.Connection:
+        """Open a new configured database connection."""
+        # Autocommit mode; write() manages transactions explicitly
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            cached_statements=256,
+            isolation_level=None
+        )
+        self._configure_connection(conn)
+        if read_only:
+            conn.execute("PRAGMA query_only=1")
+        return conn
+    
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        """Check out a read-only connection from the pool."""
+        try:
+            conn = self._read_pool.get_nowait()
+        except queue.Empty:
+            conn = None
+            with self._pool_lock:
+                if len(self._read_conns) < self.pool_size:
+                    conn = self._connect(read_only=True)
+                    self._read_conns.append(conn)
+            if conn is None:
+                conn = self._read_pool.get()
+        
+        try:
+            yield conn
+        finally:
+            self._read_pool.put(conn)
     
-    def _get_connection(self) -> sqlite3.Connection:
-        """Get database connection with row factory."""
-        if self.conn is None:
-            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            self.conn.row_factory = sqlite3.Row
-        return self.conn
+    @contextmanager
+    def write(self) -> Iterator[sqlite3.Connection]:
+        """
+        Acquire the write connection inside a transaction.
+        
+        The write lock is taken up front with BEGIN IMMEDIATE, and the
+        transaction is committed when the block exits or rolled back if it raises.
+        """
+        with self._write_lock:
+            if self._write_conn is None:
+                self._write_conn = self._connect()
+            conn = self._write_conn
+            
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+            finally:
+                self._write_version += 1
+    
+    def _configure_connection(self, conn: sqlite3.Connection):
+        """Apply performance and integrity PRAGMAs to a new connection."""
+        # WAL lets readers proceed during writes; NORMAL sync is durable
+        # enough in WAL mode and avoids an fsync on every commit.
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-65536")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA foreign_keys=ON")
     
     def init_db(self):
         """Initialize database tables."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        # Create scans table
+        with self.write() as conn:
+            cursor = conn.cursor()
+            
+            # Create scans table
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS scans (
+                    scan_id TEXT PRIMARY KEY,
+                    target TEXT NOT NULL,
+                    scan_type TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    completed_at TIMESTAMP,
+                    error TEXT,
+                    options BLOB
+                )
+            """)
+            
+            # Bring tables created by older versions up to date
+            version = cursor.execute("PRAGMA user_version").fetchone()[0]
+            if version < 5 and not self._column_exists(cursor, "scans", "options"):
+                cursor.execute("ALTER TABLE scans ADD COLUMN options BLOB")
+            if version < 4 and self._table_exists(cursor, "vulnerabilities"):
+                self._migrate_vulnerabilities(cursor, version)
+            
+            # Create vulnerabilities table
+            cursor.execute(self.VULNERABILITIES_TABLE_SQL.format(table="vulnerabilities"))
+            
+            # Running totals for get_stats, maintained by the write methods
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS stats_counters (
+                    key TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                )
+            """)
+            
+            if version < 3:
+                self._seed_stats_counters(cursor)
+            
+            # Create index for faster lookups
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_scans_started 
+                ON scans (started_at DESC)
+            """)
+            
+            # Covering index for per-scan risk level aggregates, which also
+            # serves plain scan_id lookups in place of the old idx_vulns_scan
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_vulns_scan_risk 
+                ON vulnerabilities (scan_id, risk_level)
+            """)
+            
+            cursor.execute("DROP INDEX IF EXISTS idx_vulns_scan")
+            
+            cursor.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+    
+    def _table_exists(self, cursor: sqlite3.Cursor, table: str) -> bool:
+        """Check whether a table exists in the database."""
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS scans (
-                scan_id TEXT PRIMARY KEY,
-                target TEXT NOT NULL,
-                scan_type TEXT NOT NULL,
-                status TEXT NOT NULL,
-                started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                completed_at TIMESTAMP,
-                error TEXT
-            )
-        """)
+            SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?
+        """, (table,))
+        return cursor.fetchone() is not None
+    
+    def _column_exists(self, cursor: sqlite3.Cursor, table: str, column: str) -> bool:
+        """Check whether a table has a column."""
+        cursor.execute(f"PRAGMA table_info({table})")
+        return any(row[1] == column for row in cursor.fetchall())
+    
+    def _migrate_vulnerabilities(self, cursor: sqlite3.Cursor, version: int):
+        """Rebuild the vulnerabilities table from an older schema version."""
+        # SQLite cannot alter constraints in place, so copy the rows into a
+        # freshly created table and swap it in; init_db runs all of this in
+        # the write() transaction
+        cursor.execute(self.VULNERABILITIES_TABLE_SQL.format(table="vulnerabilities_new"))
         
-        # Create vulnerabilities table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS vulnerabilities (
-                id TEXT PRIMARY KEY,
-                scan_id TEXT NOT NULL,
-                tool_name TEXT,
-                vulnerability_type TEXT,
-                risk_level TEXT,
-                description TEXT,
-                evidence TEXT,
-                owasp_mapping TEXT,
-                remediation TEXT,
-                FOREIGN KEY (scan_id) REFERENCES scans (scan_id)
-            )
+        # Versions before 4 stored every field in its own column, versions
+        # before 2 stored risk levels as text, and version 0 did not cascade
+        # deletes, so skip rows orphaned by it
+        cursor.execute(f"""
+            INSERT INTO vulnerabilities_new (id, scan_id, risk_level, data)
+            SELECT id, scan_id,
+                   CASE
+                       WHEN typeof(risk_level) = 'integer' THEN risk_level
+                       WHEN risk_level = 'CRITICAL' THEN {_CRITICAL}
+                       WHEN risk_level = 'HIGH' THEN {_HIGH}
+                       WHEN risk_level = 'MEDIUM' THEN {_MEDIUM}
+                       WHEN risk_level = 'LOW' THEN {_LOW}
+                       ELSE {_INFO}
+                   END,
+                   CAST(json_object(
+                       'tool_name', tool_name,
+                       'vulnerability_type', vulnerability_type,
+                       'description', description,
+                       'evidence', evidence,
+                       'owasp_mapping', owasp_mapping,
+                       'remediation', remediation
+                   ) AS BLOB)
+            FROM vulnerabilities
+            WHERE scan_id IN (SELECT scan_id FROM scans)
         """)
         
-        # Create index for faster lookups
+        cursor.execute("DROP TABLE vulnerabilities")
+        cursor.execute("ALTER TABLE vulnerabilities_new RENAME TO vulnerabilities")
+    
+    def _seed_stats_counters(self, cursor: sqlite3.Cursor):
+        """Compute stats_counters from the existing scans and vulnerabilities."""
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_scans_started 
-            ON scans (started_at DESC)
+            INSERT OR REPLACE INTO stats_counters (key, value)
+            SELECT 'total_scans', COUNT(*) FROM scans
         """)
-        
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_vulns_scan 
-            ON vulnerabilities (scan_id)
+            INSERT OR REPLACE INTO stats_counters (key, value)
+            SELECT 'scans:' || substr(started_at, 1, 10), COUNT(*) FROM scans
+            GROUP BY substr(started_at, 1, 10)
         """)
-        
-        conn.commit()
+        cursor.execute(f"""
+            INSERT OR REPLACE INTO stats_counters (key, value)
+            SELECT 'total_vulns', COUNT(*) FROM vulnerabilities
+            UNION ALL
+            SELECT 'critical_count', COUNT(*) FROM vulnerabilities WHERE risk_level = {_CRITICAL}
+            UNION ALL
+            SELECT 'high_count', COUNT(*) FROM vulnerabilities WHERE risk_level = {_HIGH}
+        """)
+    
+    def _add_to_counters(self, cursor: sqlite3.Cursor, deltas: dict):
+        """Add deltas to stats_counters within the caller's transaction."""
+        cursor.executemany("""
+            INSERT INTO stats_counters (key, value) VALUES (?, ?)
+            ON CONFLICT (key) DO UPDATE SET value = value + excluded.value
+        """, deltas.items())
     
     def create_scan(
         self,
         scan_id: str,
         target: str,
         scan_type: str,
-        status: str = "running"
+        status: str = "running",
+        options: Optional[dict] = None
     ):
-        """Create a new scan record."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO scans (scan_id, target, scan_type, status, started_at)
-            VALUES (?, ?, ?, ?, ?)
-        """, (scan_id, target, scan_type, status, datetime.utcnow()))
+        """
+        Create a new scan record.
         
-        conn.commit()
+        Options are kept, orjson-encoded, until the scan completes so that an
+        interrupted scan can be resumed with them.
+        """
+        with self.write() as conn:
+            cursor = conn.cursor()
+            
+            # Timestamps are stamped by SQLite, with millisecond precision
+            cursor.execute("""
+                INSERT INTO scans (scan_id, target, scan_type, status, started_at, options)
+                VALUES (?, ?, ?, ?, strftime('%Y-%m-%d %H:%M:%f', 'now'), ?)
+            """, (
+                scan_id, target, scan_type, status,
+                orjson.dumps(options) if options is not None else None
+            ))
+            
+            self._add_to_counters(cursor, {"total_scans": 1})
+            cursor.execute("""
+                INSERT INTO stats_counters (key, value)
+                SELECT 'scans:' || substr(started_at, 1, 10), 1 FROM scans WHERE scan_id = ?
+                ON CONFLICT (key) DO UPDATE SET value = value + excluded.value
+            """, (scan_id,))
+    
+    def set_scan_status(self, scan_id: str, status: str):
+        """Change the status of a scan without completing it."""
+        with self.write() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                UPDATE scans SET status = ? WHERE scan_id = ?
+            """, (status, scan_id))
     
     def update_scan(
         self,
@@ -97,185 +339,251 @@ class Database:
         error: Optional[str] = None
     ):
         """Update scan status and store results."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        # Update scan record
-        cursor.execute("""
-            UPDATE scans 
-            SET status = ?, completed_at = ?, error = ?
-            WHERE scan_id = ?
-        """, (status, datetime.utcnow(), error, scan_id))
-        
-        # Store vulnerabilities if any
-        if results:
-            for vuln in results:
-                cursor.execute("""
-                    INSERT INTO vulnerabilities 
-                    (id, scan_id, tool_name, vulnerability_type, risk_level, 
-                     description, evidence, owasp_mapping, remediation)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    vuln.get("id"),
-                    scan_id,
-                    vuln.get("tool_name"),
-                    vuln.get("vulnerability_type"),
-                    vuln.get("risk_level"),
-                    vuln.get("description"),
-                    vuln.get("evidence"),
-                    vuln.get("owasp_mapping"),
-                    vuln.get("remediation")
-                ))
-        
-        conn.commit()
+        with self.write() as conn:
+            cursor = conn.cursor()
+            
+            # Update scan record; options are only needed to resume the scan,
+            # so credentials in them are not kept once it is finished
+            cursor.execute("""
+                UPDATE scans 
+                SET status = ?, completed_at = strftime('%Y-%m-%d %H:%M:%f', 'now'), error = ?,
+                    options = NULL
+                WHERE scan_id = ?
+            """, (status, error, scan_id))
+            
+            # Store vulnerabilities in a single batch; the scan UPDATE above and
+            # these INSERTs share the write() transaction.
+            if results:
+                rows = [_vulnerability_row(scan_id, vuln) for vuln in results]
+                cursor.executemany(self.INSERT_VULNERABILITY_SQL, rows)
+                
+                codes = Counter(row[1] for row in rows)
+                self._add_to_counters(cursor, {
+                    "total_vulns": len(rows),
+                    "critical_count": codes[_CRITICAL],
+                    "high_count": codes[_HIGH]
+                })
     
     def get_scan(self, scan_id: str) -> Optional[dict]:
         """Get scan results by ID."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        # Get scan record
-        cursor.execute("""
-            SELECT * FROM scans WHERE scan_id = ?
-        """, (scan_id,))
-        
-        scan_row = cursor.fetchone()
-        if not scan_row:
-            return None
-        
-        scan = dict(scan_row)
-        
-        # Get vulnerabilities
-        cursor.execute("""
-            SELECT * FROM vulnerabilities WHERE scan_id = ?
-        """, (scan_id,))
-        
-        vulnerabilities = [dict(row) for row in cursor.fetchall()]
-        
-        # Build summary
-        summary = {
-            "total": len(vulnerabilities),
-            "critical": len([v for v in vulnerabilities if v["risk_level"] == "CRITICAL"]),
-            "high": len([v for v in vulnerabilities if v["risk_level"] == "HIGH"]),
-            "medium": len([v for v in vulnerabilities if v["risk_level"] == "MEDIUM"]),
-            "low": len([v for v in vulnerabilities if v["risk_level"] == "LOW"]),
-        }
-        
-        return {
-            "scan_id": scan["scan_id"],
-            "target": scan["target"],
-            "scan_type": scan["scan_type"],
-            "status": scan["status"],
-            "started_at": scan["started_at"],
-            "completed_at": scan["completed_at"],
-            "vulnerabilities": vulnerabilities,
-            "summary": summary,
-            "error": scan["error"]
-        }
+        # Timestamps are returned in ISO 8601 form, ready for the API response
+        with self.read() as conn:
+            cursor = conn.cursor()
+            
+            # Get scan record
+            cursor.execute("""
+                SELECT target, scan_type, status,
+                       replace(started_at, ' ', 'T'), replace(completed_at, ' ', 'T'),
+                       error
+                FROM scans WHERE scan_id = ?
+            """, (scan_id,))
+            
+            scan_row = cursor.fetchone()
+            if not scan_row:
+                return None
+            
+            target, scan_type, status, started_at, completed_at, error = scan_row
+            
+            # Build summary in SQL
+            cursor.execute("""
+                SELECT risk_level, COUNT(*) FROM vulnerabilities
+                WHERE scan_id = ?
+                GROUP BY risk_level
+            """, (scan_id,))
+            
+            counts = {risk_level: count for risk_level, count in cursor.fetchall()}
+            summary = {
+                "total": sum(counts.values()),
+                "critical": counts.get(_CRITICAL, 0),
+                "high": counts.get(_HIGH, 0),
+                "medium": counts.get(_MEDIUM, 0),
+                "low": counts.get(_LOW, 0),
+            }
+            
+            # Get vulnerabilities, in the order they were recorded
+            cursor.execute("""
+                SELECT id, risk_level, data FROM vulnerabilities
+                WHERE scan_id = ?
+                ORDER BY rowid
+            """, (scan_id,))
+            
+            vulnerabilities = [
+                {"id": vuln_id, "risk_level": INT_TO_RISK[risk_level], **orjson.loads(data)}
+                for vuln_id, risk_level, data in cursor
+            ]
+            
+            return {
+                "scan_id": scan_id,
+                "target": target,
+                "scan_type": scan_type,
+                "status": status,
+                "started_at": started_at,
+                "completed_at": completed_at,
+                "vulnerabilities": vulnerabilities,
+                "summary": summary,
+                "error": error
+            }
     
     def list_scans(self, limit: int = 20) -> list[dict]:
         """List recent scans."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT * FROM scans 
-            ORDER BY started_at DESC 
-            LIMIT ?
-        """, (limit,))
-        
-        scans = []
-        for row in cursor.fetchall():
-            scan = dict(row)
+        with self.read() as conn:
+            cursor = conn.cursor()
             
-            # Get vulnerability count
-            cursor.execute("""
+            # Fetch scans with their vulnerability counts in one query. The
+            # page is picked from idx_scans_started first, so only its scans
+            # are joined and aggregated
+            cursor.execute(f"""
                 SELECT 
-                    COUNT(*) as total,
-                    SUM(CASE WHEN risk_level = 'CRITICAL' THEN 1 ELSE 0 END) as critical,
-                    SUM(CASE WHEN risk_level = 'HIGH' THEN 1 ELSE 0 END) as high,
-                    SUM(CASE WHEN risk_level = 'MEDIUM' THEN 1 ELSE 0 END) as medium,
-                    SUM(CASE WHEN risk_level = 'LOW' THEN 1 ELSE 0 END) as low
-                FROM vulnerabilities 
-                WHERE scan_id = ?
-            """, (scan["scan_id"],))
-            
-            counts = dict(cursor.fetchone())
+                    s.scan_id, s.target, s.scan_type, s.status,
+                    replace(s.started_at, ' ', 'T'), replace(s.completed_at, ' ', 'T'),
+                    s.error,
+                    COUNT(v.id) as total,
+                    SUM(v.risk_level = {_CRITICAL}) as critical,
+                    SUM(v.risk_level = {_HIGH}) as high,
+                    SUM(v.risk_level = {_MEDIUM}) as medium,
+                    SUM(v.risk_level = {_LOW}) as low
+                FROM (
+                    SELECT scan_id, target, scan_type, status, started_at, completed_at, error
+                    FROM scans ORDER BY started_at DESC LIMIT ?
+                ) s
+                LEFT JOIN vulnerabilities v ON v.scan_id = s.scan_id
+                GROUP BY s.scan_id
+                ORDER BY s.started_at DESC
+            """, (limit,))
             
-            scans.append({
-                "scan_id": scan["scan_id"],
-                "target": scan["target"],
-                "scan_type": scan["scan_type"],
-                "status": scan["status"],
-                "started_at": scan["started_at"],
-                "completed_at": scan["completed_at"],
+            # Read the whole page before the connection goes back to the pool
+            rows = cursor.fetchall()
+        
+        return [
+            {
+                "scan_id": scan_id,
+                "target": target,
+                "scan_type": scan_type,
+                "status": status,
+                "started_at": started_at,
+                "completed_at": completed_at,
                 "vulnerabilities": [],  # Don't include full vulns in list
                 "summary": {
-                    "total": counts["total"] or 0,
-                    "critical": counts["critical"] or 0,
-                    "high": counts["high"] or 0,
-                    "medium": counts["medium"] or 0,
-                    "low": counts["low"] or 0,
+                    "total": total,
+                    "critical": critical or 0,
+                    "high": high or 0,
+                    "medium": medium or 0,
+                    "low": low or 0,
                 },
-                "error": scan["error"]
-            })
-        
-        return scans
+                "error": error
+            }
+            for (
+                scan_id, target, scan_type, status, started_at, completed_at,
+                error, total, critical, high, medium, low
+            ) in rows
+        ]
+    
+    def list_pending_scans(self) -> list[dict]:
+        """List scans that were queued or interrupted before completing."""
+        with self.read() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT scan_id, target, scan_type, options FROM scans 
+                WHERE status IN ('queued', 'running')
+                ORDER BY started_at
+            """)
+            
+            return [
+                {
+                    "scan_id": scan_id,
+                    "target": target,
+                    "scan_type": scan_type,
+                    "options": orjson.loads(options) if options is not None else None
+                }
+                for scan_id, target, scan_type, options in cursor
+            ]
     
     def delete_scan(self, scan_id: str) -> bool:
         """Delete a scan and its vulnerabilities."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        # Check if scan exists
-        cursor.execute("SELECT scan_id FROM scans WHERE scan_id = ?", (scan_id,))
-        if not cursor.fetchone():
-            return False
-        
-        # Delete vulnerabilities first (foreign key)
-        cursor.execute("DELETE FROM vulnerabilities WHERE scan_id = ?", (scan_id,))
-        cursor.execute("DELETE FROM scans WHERE scan_id = ?", (scan_id,))
-        
-        conn.commit()
-        return True
+        with self.write() as conn:
+            cursor = conn.cursor()
+            
+            # Look up what the scan contributed to stats_counters
+            cursor.execute(f"""
+                SELECT 
+                    substr(s.started_at, 1, 10),
+                    COUNT(v.id),
+                    SUM(v.risk_level = {_CRITICAL}),
+                    SUM(v.risk_level = {_HIGH})
+                FROM scans s
+                LEFT JOIN vulnerabilities v ON v.scan_id = s.scan_id
+                WHERE s.scan_id = ?
+                GROUP BY s.scan_id
+            """, (scan_id,))
+            
+            row = cursor.fetchone()
+            if row is None:
+                return False
+            started_day, total, critical, high = row
+            
+            # Vulnerabilities are removed by ON DELETE CASCADE
+            cursor.execute("DELETE FROM scans WHERE scan_id = ?", (scan_id,))
+            
+            self._add_to_counters(cursor, {
+                "total_scans": -1,
+                f"scans:{started_day}": -1,
+                "total_vulns": -total,
+                "critical_count": -(critical or 0),
+                "high_count": -(high or 0)
+            })
+            return True
     
     def get_stats(self) -> dict:
-        """Get dashboard statistics."""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        # Total scans
-        cursor.execute("SELECT COUNT(*) FROM scans")
-        total_scans = cursor.fetchone()[0]
+        """Get dashboard statistics, cached briefly between writes."""
+        write_version = self._write_version
+        cached = self._stats_cache
+        if (
+            cached is not None
+            and cached[1] == write_version
+            and time.monotonic() < cached[0]
+        ):
+            return dict(cached[2])
         
-        # Scans today
-        today = datetime.utcnow().date()
-        cursor.execute("""
-            SELECT COUNT(*) FROM scans 
-            WHERE DATE(started_at) = ?
-        """, (today.isoformat(),))
-        scans_today = cursor.fetchone()[0]
-        
-        # Vulnerability counts
-        cursor.execute("""
-            SELECT 
-                COUNT(*) as total,
-                SUM(CASE WHEN risk_level = 'CRITICAL' THEN 1 ELSE 0 END) as critical,
-                SUM(CASE WHEN risk_level = 'HIGH' THEN 1 ELSE 0 END) as high
-            FROM vulnerabilities
-        """)
-        vuln_counts = dict(cursor.fetchone())
+        stats = self._compute_stats()
+        self._stats_cache = (
+            time.monotonic() + self.STATS_CACHE_TTL,
+            write_version,
+            stats
+        )
+        return dict(stats)
+    
+    def _compute_stats(self) -> dict:
+        """Read the dashboard statistics from stats_counters."""
+        today_key = f"scans:{time.strftime('%Y-%m-%d', time.gmtime())}"
         
-        return {
-            "total_scans": total_scans,
-            "scans_today": scans_today,
-            "total_vulnerabilities": vuln_counts["total"] or 0,
-            "critical_count": vuln_counts["critical"] or 0,
-            "high_count": vuln_counts["high"] or 0
-        }
+        with self.read() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT key, value FROM stats_counters
+                WHERE key IN ('total_scans', 'total_vulns', 'critical_count', 'high_count', ?)
+            """, (today_key,))
+            counters = dict(cursor.fetchall())
+            
+            return {
+                "total_scans": counters.get("total_scans", 0),
+                "scans_today": counters.get(today_key, 0),
+                "total_vulnerabilities": counters.get("total_vulns", 0),
+                "critical_count": counters.get("critical_count", 0),
+                "high_count": counters.get("high_count", 0)
+            }
     
     def close(self):
-        """Close database connection."""
-        if self.conn:
-            self.conn.close()
-            self.conn = None
+        """Close all database connections."""
+        with self._write_lock:
+            if self._write_conn:
+                self._write_conn.close()
+                self._write_conn = None
+        
+        with self._pool_lock:
+            for conn in self._read_conns:
+                conn.close()
+            self._read_conns = []
+            self._read_pool = queue.Queue()
+
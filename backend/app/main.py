@@ -1,10 +1,17 @@
 """
 MCP Security Dashboard - FastAPI Backend
 """
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from collections import Counter
 from datetime import datetime
+from typing import Iterator, Optional
+import asyncio
+import logging
 import uuid
+import orjson
 
 from .models import ScanRequest, ScanResponse, ScanResult, VulnerabilityDetail
 from .scanner import MCPScanner
@@ -13,7 +20,8 @@ from .database import Database
 app = FastAPI(
     title="MCP Security Dashboard",
     description="Scan MCP servers for security vulnerabilities",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS for frontend
@@ -25,15 +33,46 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+logger = logging.getLogger(__name__)
+
 # Initialize components
 db = Database()
-scanner = MCPScanner()
+scanner: Optional[MCPScanner] = None
+
+# Pending scans, consumed by SCAN_WORKERS concurrent scan_worker tasks so a
+# slow scan doesn't hold up the ones queued behind it
+SCAN_QUEUE_SIZE = 100
+SCAN_WORKERS = 4
+scan_queue: Optional[asyncio.Queue] = None
+scan_worker_tasks: list[asyncio.Task] = []
 
 
 @app.on_event("startup")
 async def startup():
-    """Initialize database on startup."""
-    db.init_db()
+    """Initialize database and scanner, and start the scan workers."""
+    global scanner, scan_queue
+    
+    await run_in_threadpool(db.init_db)
+    scanner = await MCPScanner.create()
+    
+    # Scans left queued or running by a previous process are resumed first
+    pending = await run_in_threadpool(db.list_pending_scans)
+    
+    scan_queue = asyncio.Queue(maxsize=SCAN_QUEUE_SIZE)
+    
+    # The workers share one iterator, so each pending scan is resumed once
+    pending_scans = iter(pending)
+    scan_worker_tasks[:] = [
+        asyncio.create_task(scan_worker(pending_scans))
+        for _ in range(SCAN_WORKERS)
+    ]
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop the scan workers."""
+    for task in scan_worker_tasks:
+        task.cancel()
 
 
 @app.get("/")
@@ -43,35 +82,77 @@ async def root():
 
 
 @app.post("/api/scan", response_model=ScanResponse)
-async def start_scan(request: ScanRequest, background_tasks: BackgroundTasks):
+async def start_scan(request: ScanRequest):
     """
-    Start a new MCP server security scan.
+    Queue a new MCP server security scan.
     
-    The scan runs in the background and results can be fetched via GET /api/scan/{scan_id}
+    The scan is run by a background worker and results can be fetched via GET /api/scan/{scan_id}
     """
     scan_id = str(uuid.uuid4())
     
     # Create initial scan record
-    db.create_scan(
+    await run_in_threadpool(
+        db.create_scan,
         scan_id=scan_id,
         target=request.target,
         scan_type=request.scan_type,
-        status="running"
+        status="queued",
+        options=request.options.model_dump() if request.options else None
     )
     
-    # Run scan in background
-    background_tasks.add_task(run_scan_task, scan_id, request)
+    # Hand off to the scan workers without waiting for room in the queue; a
+    # request cancelled while waiting would leave the scan queued forever
+    try:
+        scan_queue.put_nowait((scan_id, request))
+    except asyncio.QueueFull:
+        await run_in_threadpool(
+            db.update_scan,
+            scan_id=scan_id,
+            status="failed",
+            error="Scan queue is full"
+        )
+        raise HTTPException(status_code=503, detail="Too many scans queued, try again later")
     
     return ScanResponse(
         scan_id=scan_id,
-        status="running",
-        message=f"Scan started for {request.target}"
+        status="queued",
+        message=f"Scan queued for {request.target}"
     )
 
 
+async def scan_worker(pending: Iterator[dict]):
+    """Run queued scans, starting with any left over from a previous run."""
+    for scan in pending:
+        request = ScanRequest(
+            target=scan["target"],
+            scan_type=scan["scan_type"],
+            options=scan["options"]
+        )
+        await run_queued_scan(scan["scan_id"], request)
+    
+    while True:
+        scan_id, request = await scan_queue.get()
+        try:
+            await run_queued_scan(scan_id, request)
+        finally:
+            scan_queue.task_done()
+
+
+async def run_queued_scan(scan_id: str, request: ScanRequest):
+    """Run a scan from the worker without letting errors stop the worker."""
+    try:
+        await run_scan_task(scan_id, request)
+    except Exception:
+        # run_scan_task records scan failures itself; this only guards
+        # against the database being unavailable while doing so
+        logger.exception("Could not record the outcome of scan %s", scan_id)
+
+
 async def run_scan_task(scan_id: str, request: ScanRequest):
-    """Background task to run the actual scan."""
+    """Run the actual scan and store its results."""
     try:
+        await run_in_threadpool(db.set_scan_status, scan_id, "running")
+        
         # Run the scanner
         results = await scanner.scan(
             target=request.target,
@@ -80,24 +161,28 @@ async def run_scan_task(scan_id: str, request: ScanRequest):
         )
         
         # Store results
-        db.update_scan(
+        await run_in_threadpool(
+            db.update_scan,
             scan_id=scan_id,
             status="completed",
             results=results
         )
         
     except Exception as e:
-        db.update_scan(
+        await run_in_threadpool(
+            db.update_scan,
             scan_id=scan_id,
             status="failed",
             error=str(e)
         )
 
 
-@app.get("/api/scan/{scan_id}", response_model=ScanResult)
+# Read endpoints return rows straight from the database; the models are only
+# used for the OpenAPI schema, not to re-validate the response
+@app.get("/api/scan/{scan_id}", responses={200: {"model": ScanResult}})
 async def get_scan_results(scan_id: str):
     """Get results for a specific scan."""
-    result = db.get_scan(scan_id)
+    result = await run_in_threadpool(db.get_scan, scan_id)
     
     if not result:
         raise HTTPException(status_code=404, detail="Scan not found")
@@ -105,16 +190,28 @@ async def get_scan_results(scan_id: str):
     return result
 
 
-@app.get("/api/scans", response_model=list[ScanResult])
+@app.get("/api/scans", responses={200: {"model": list[ScanResult]}})
 async def list_scans(limit: int = 20):
     """List recent scans."""
-    return db.list_scans(limit=limit)
+    return await run_in_threadpool(db.list_scans, limit=limit)
+
+
+@app.get("/api/scans/stream")
+async def stream_scans(limit: int = 20):
+    """Stream recent scans as newline-delimited JSON, one scan per line."""
+    # The page is read up front so a slow client never holds a pooled
+    # database connection; only the encoding is streamed
+    scans = await run_in_threadpool(db.list_scans, limit=limit)
+    return StreamingResponse(
+        (orjson.dumps(scan) + b"\n" for scan in scans),
+        media_type="application/x-ndjson"
+    )
 
 
 @app.delete("/api/scan/{scan_id}")
 async def delete_scan(scan_id: str):
     """Delete a scan and its results."""
-    success = db.delete_scan(scan_id)
+    success = await run_in_threadpool(db.delete_scan, scan_id)
     
     if not success:
         raise HTTPException(status_code=404, detail="Scan not found")
@@ -125,7 +222,7 @@ async def delete_scan(scan_id: str):
 @app.get("/api/stats")
 async def get_stats():
     """Get dashboard statistics."""
-    return db.get_stats()
+    return await run_in_threadpool(db.get_stats)
 
 
 # Quick scan endpoint for demo purposes
@@ -142,16 +239,18 @@ async def quick_scan(request: ScanRequest):
             options=request.options
         )
         
+        counts = Counter(v.get("risk_level") for v in results)
+        
         return {
             "status": "completed",
             "target": request.target,
             "vulnerabilities": results,
             "summary": {
                 "total": len(results),
-                "critical": len([v for v in results if v.get("risk_level") == "CRITICAL"]),
-                "high": len([v for v in results if v.get("risk_level") == "HIGH"]),
-                "medium": len([v for v in results if v.get("risk_level") == "MEDIUM"]),
-                "low": len([v for v in results if v.get("risk_level") == "LOW"]),
+                "critical": counts["CRITICAL"],
+                "high": counts["HIGH"],
+                "medium": counts["MEDIUM"],
+                "low": counts["LOW"],
             }
         }
         
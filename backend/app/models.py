@@ -21,6 +21,17 @@ class RiskLevel(str, Enum):
     INFO = "INFO"
 
 
+# Compact integer encoding of RiskLevel used for database storage
+RISK_TO_INT = {
+    RiskLevel.CRITICAL: 0,
+    RiskLevel.HIGH: 1,
+    RiskLevel.MEDIUM: 2,
+    RiskLevel.LOW: 3,
+    RiskLevel.INFO: 4,
+}
+INT_TO_RISK = {code: level.value for level, code in RISK_TO_INT.items()}
+
+
 class ScanOptions(BaseModel):
     """Optional scan configuration."""
     timeout: int = Field(default=30, description="Scan timeout in seconds")